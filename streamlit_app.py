@@ -3,11 +3,18 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import datetime
+import io
+import json
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+from wordcloud import WordCloud, STOPWORDS
 from googleapiclient.discovery import build
 from streamlit_echarts import st_echarts
 
@@ -20,41 +27,136 @@ st.title("📊 YouTube Content Analyzer")
 # ------------------------------
 # HELPER FUNCTIONS
 # ------------------------------
-analyzer = SentimentIntensityAnalyzer()
+@st.cache_resource(show_spinner=False)
+def get_analyzer():
+    # Loads the ~7500-token VADER lexicon once per process
+    return SentimentIntensityAnalyzer()
+
+# Fetched API data is persisted per video so a worker restart does not
+# re-spend quota within the TTL; streamlit's persist="disk" cannot expire
+# entries, so freshness is checked against the file mtime instead
+_DISK_CACHE_DIR = Path(".cache")
+_DISK_CACHE_TTL = 24 * 3600
+
+def _disk_cache_fresh(path):
+    return path.exists() and time.time() - path.stat().st_mtime < _DISK_CACHE_TTL
+
+URL_RE = re.compile(r"http\S+|www\S+")
+PUNCT_RE = re.compile(r"[^A-Za-z0-9\s❤️‍🔥]")
+VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/)([A-Za-z0-9_-]{11})")
+
+def clean_comments(texts):
+    """
+    Vectorized version of clean_text: one Arrow-kernel pass per regex over
+    the whole column instead of Python dispatch per row. The patterns are
+    passed as strings because the Arrow-backed .str.replace falls back to
+    the per-row object path when handed compiled re.Pattern objects.
+    """
+    return (
+        texts.astype("string[pyarrow]")
+        .str.replace(URL_RE.pattern, "", regex=True)
+        .str.replace(PUNCT_RE.pattern, "", regex=True)
+        .str.strip()
+        .str.lower()
+    )
 
 def clean_text(text):
-    text = re.sub(r"http\S+|www\S+", "", text)  # remove URLs
-    text = re.sub(r"[^A-Za-z0-9\s❤️‍🔥]", "", text)  # remove punctuation but keep hearts/fire
-    return text.strip().lower()
+    # Scalar fallback for clean_comments; reuses the precompiled patterns
+    # (remove URLs, then punctuation but keep hearts/fire)
+    return PUNCT_RE.sub("", URL_RE.sub("", text)).strip().lower()
 
-def get_vader_sentiment(text):
+def score_sentiment(texts):
     """
-    Returns sentiment label based on VADER compound score.
-    Positive, Neutral, Negative
+    Returns VADER compound scores for a sequence of texts as a float32 array.
+    Labels are derived in bulk with np.select instead of per-row branching.
     """
-    score = analyzer.polarity_scores(text)["compound"]
-    if score >= 0.05:
-        return "Positive"
-    elif score <= -0.05:
-        return "Negative"
-    else:
-        return "Neutral"
+    analyzer = get_analyzer()
+    return np.fromiter(
+        (analyzer.polarity_scores(t)["compound"] for t in texts),
+        dtype=np.float32,
+        count=len(texts),
+    )
+
+@st.cache_data(ttl=3 * 3600, show_spinner=False)
+def comments_csv_bytes(video_id, _df):
+    """
+    Serializes the comments frame to CSV bytes with Arrow's multithreaded
+    writer, cached per video so reruns don't re-serialize.
+    """
+    buf = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(_df, preserve_index=False), buf)
+    return buf.getvalue()
+
+@st.cache_data(ttl=24 * 3600, show_spinner=False)
+def comments_parquet_bytes(video_id, _df):
+    """
+    Serializes the comments frame to zstd-compressed Parquet bytes; the
+    columnar writer streams typed blocks with no per-row string escaping.
+    """
+    buf = io.BytesIO()
+    _df.to_parquet(buf, engine="pyarrow", compression="zstd")
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False)
+def render_wordcloud(freqs_tuple):
+    """
+    Renders the word cloud to PNG bytes, cached on the frequency pairs so
+    reruns with the same comments skip the layout step entirely.
+
+    A fresh WordCloud is built per call: generate_from_frequencies mutates
+    the instance, so a shared one would race across concurrent sessions,
+    and construction only stores parameters anyway. Horizontal-only
+    placement skips rotation retries in the layout loop, and collocations
+    stay off since the input is a precomputed freq dict.
+    """
+    wordcloud = WordCloud(
+        width=800,
+        height=400,
+        background_color="white",
+        collocations=False,
+        prefer_horizontal=1.0,
+        min_font_size=8,
+    ).generate_from_frequencies(dict(freqs_tuple))
+    buf = io.BytesIO()
+    wordcloud.to_image().save(buf, format="PNG")
+    return buf.getvalue()
 
 def get_video_id(url):
-    if "v=" in url:
-        return url.split("v=")[1].split("&")[0]
-    elif "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0]
-    return None
-
-def fetch_video_details(video_id, api_key):
-    youtube = build("youtube", "v3", developerKey=api_key)
-    req = youtube.videos().list(part="snippet,statistics", id=video_id)
+    # One linear scan extracts and validates the 11-char ID in a single match
+    match = VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
+
+@st.cache_resource(show_spinner=False)
+def get_youtube_client():
+    # Built once per process; static_discovery skips the ~200KB discovery
+    # document download entirely.
+    return build(
+        "youtube",
+        "v3",
+        developerKey=st.secrets["api_key"],
+        cache_discovery=False,
+        static_discovery=True,
+    )
+
+@st.cache_data(ttl=24 * 3600, show_spinner=False)
+def fetch_video_details(video_id):
+    cache_path = _DISK_CACHE_DIR / f"{video_id}_details.json"
+    if _disk_cache_fresh(cache_path):
+        return json.loads(cache_path.read_text())
+    youtube = get_youtube_client()
+    req = youtube.videos().list(
+        part="snippet,statistics",
+        id=video_id,
+        fields="items(snippet(title,channelTitle,publishedAt),"
+        "statistics(viewCount,likeCount,commentCount))",
+    )
     res = req.execute()
     if not res["items"]:
+        # Misses are not written to disk, so a bad id is retried after the
+        # in-memory TTL instead of being frozen as None
         return None
     item = res["items"][0]
-    return {
+    details = {
         "title": item["snippet"]["title"],
         "channel": item["snippet"]["channelTitle"],
         "published": item["snippet"]["publishedAt"],
@@ -62,36 +164,156 @@ def fetch_video_details(video_id, api_key):
         "likes": int(item["statistics"].get("likeCount", 0)),
         "comments": int(item["statistics"].get("commentCount", 0))
     }
+    _DISK_CACHE_DIR.mkdir(exist_ok=True)
+    cache_path.write_text(json.dumps(details))
+    return details
 
-def fetch_comments(video_id, api_key):
-    youtube = build("youtube", "v3", developerKey=api_key)
-    comments = []
-    next_page_token = None
-    while True:
-        req = youtube.commentThreads().list(
-            part="snippet",
-            videoId=video_id,
-            maxResults=100,
-            pageToken=next_page_token
+def _comment_page_request(youtube, video_id, page_token):
+    return youtube.commentThreads().list(
+        part="snippet",
+        videoId=video_id,
+        maxResults=100,
+        pageToken=page_token,
+        fields="items(snippet/topLevelComment/snippet("
+        "authorDisplayName,textDisplay,likeCount,publishedAt)),nextPageToken",
+    )
+
+@st.cache_data(ttl=24 * 3600, show_spinner=False)
+def fetch_comments(video_id):
+    cache_path = _DISK_CACHE_DIR / f"{video_id}_comments.parquet"
+    if _disk_cache_fresh(cache_path):
+        return pd.read_parquet(cache_path)
+    youtube = get_youtube_client()
+    # Struct-of-arrays accumulation: one list per column instead of one dict
+    # per comment, so pandas gets pre-shaped columns and a single dtype pass.
+    authors, texts, likes, pubs = [], [], [], []
+    # The API only hands out the next pageToken with each response, so pages
+    # cannot be fetched out of order; instead, fire the next page's request
+    # in a worker thread while this thread unpacks the current page, hiding
+    # one network round-trip behind each parse pass.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_comment_page_request(youtube, video_id, None).execute)
+        while future is not None:
+            res = future.result()
+            next_page_token = res.get("nextPageToken")
+            if next_page_token:
+                future = executor.submit(
+                    _comment_page_request(youtube, video_id, next_page_token).execute
+                )
+            else:
+                future = None
+            for item in res["items"]:
+                snippet = item["snippet"]["topLevelComment"]["snippet"]
+                authors.append(snippet["authorDisplayName"])
+                texts.append(snippet["textDisplay"])
+                likes.append(snippet["likeCount"])
+                pubs.append(snippet["publishedAt"])
+    df = pd.DataFrame({
+        # Arrow-backed strings: one contiguous UTF-8 buffer per column
+        # instead of a Python str object per cell
+        "Author": pd.array(authors, dtype="string[pyarrow]"),
+        "Text": pd.array(texts, dtype="string[pyarrow]"),
+        "Likes": np.asarray(likes, dtype=np.int32),
+        # Giving the exact format skips pandas' format-sniffing path
+        "PublishedAt": pd.to_datetime(pubs, format="%Y-%m-%dT%H:%M:%SZ", utc=True),
+    })
+    _DISK_CACHE_DIR.mkdir(exist_ok=True)
+    df.to_parquet(cache_path)
+    return df
+
+# ------------------------------
+# PAGE SECTIONS
+# ------------------------------
+# Each section is an st.fragment so interacting with a widget inside one
+# (e.g. an ECharts legend toggle) reruns only that section, not the whole
+# script.
+
+@st.fragment
+def download_section(df, video_id):
+    # The format radio lives inside the fragment so flipping it reruns only
+    # this block; both serializations are cached per video on top of that
+    download_format = st.radio("Download format", ("CSV", "Parquet"), horizontal=True)
+    if download_format == "CSV":
+        csv = comments_csv_bytes(video_id, df)
+        st.download_button("⬇️ Download Comments CSV", csv, "youtube_comments.csv", "text/csv")
+    else:
+        parquet = comments_parquet_bytes(video_id, df)
+        st.download_button(
+            "⬇️ Download Comments Parquet",
+            parquet,
+            f"{video_id}.parquet",
+            "application/octet-stream",
         )
-        res = req.execute()
-        for item in res["items"]:
-            snippet = item["snippet"]["topLevelComment"]["snippet"]
-            comments.append({
-                "Author": snippet["authorDisplayName"],
-                "Text": snippet["textDisplay"],
-                "Likes": snippet["likeCount"],
-                "PublishedAt": snippet["publishedAt"]
-            })
-        next_page_token = res.get("nextPageToken")
-        if not next_page_token:
-            break
-    return pd.DataFrame(comments)
+
+@st.fragment
+def monthly_activity_section(df):
+    st.subheader("📈 Comment Activity Over Time (Monthly)")
+    # Truncate the int64 timestamps to month resolution and count with
+    # np.unique: one sort over a contiguous array, already in axis order,
+    # with no Period or Python date objects materialized
+    months = df["PublishedAt"].values.astype("datetime64[M]")
+    uniq_months, month_counts = np.unique(months, return_counts=True)
+
+    options_month = {
+        "tooltip": {"trigger": "axis"},
+        "xAxis": {"type": "category", "data": [str(m) for m in uniq_months]},
+        "yAxis": {"type": "value"},
+        "series": [{"data": month_counts.tolist(), "type": "line", "smooth": True}],
+    }
+    st_echarts(options=options_month, height="400px")
+
+@st.fragment
+def wordcloud_section(word_counts):
+    st.subheader("☁️ Word Cloud of Most Frequent Words")
+    st.image(render_wordcloud(tuple(sorted(word_counts.items()))), use_container_width=True)
+
+@st.fragment
+def sentiment_highlights_section(df):
+    st.subheader("💬 Sentiment Highlights")
+    # Project down to the two rendered columns before the partial selection
+    # so nlargest only moves the bytes the section actually displays
+    pos_comments = df.loc[df["Sentiment"] == "Positive", ["Text", "Likes"]].nlargest(5, "Likes")
+    neg_comments = df.loc[df["Sentiment"] == "Negative", ["Text", "Likes"]].nlargest(5, "Likes")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Top Positive Comments:** 🌞")
+        for text, n_likes in zip(pos_comments["Text"].to_numpy(), pos_comments["Likes"].to_numpy()):
+            st.write(f"👉 {text}  \n❤️ Likes: {n_likes}")
+    with col2:
+        st.markdown("**Top Negative Comments:** ⚡")
+        for text, n_likes in zip(neg_comments["Text"].to_numpy(), neg_comments["Likes"].to_numpy()):
+            st.write(f"👎 {text}  \n💔 Likes: {n_likes}")
+
+@st.fragment
+def sentiment_pie_section(df):
+    st.subheader("📊 Sentiment Distribution (Interactive)")
+    order = ["Positive", "Neutral", "Negative"]
+    vals = df["Sentiment"].value_counts().reindex(order, fill_value=0).tolist()
+    data_list = [{"value": v, "name": n} for v, n in zip(vals, order)]
+
+    options = {
+        "tooltip": {"trigger": "item", "formatter": "{b}: {c} ({d}%)"},
+        "legend": {"top": "5%", "left": "center"},
+        "series": [
+            {
+                "name": "Sentiment",
+                "type": "pie",
+                "radius": ["40%", "70%"],
+                "avoidLabelOverlap": False,
+                "itemStyle": {"borderRadius": 10, "borderColor": "#fff", "borderWidth": 2},
+                "emphasis": {"label": {"show": True, "fontSize": 20, "fontWeight": "bold"}},
+                "label": {"show": False},
+                "labelLine": {"show": False},
+                "data": data_list,
+            }
+        ],
+    }
+    st_echarts(options=options, height="400px")
 
 # ------------------------------
 # MAIN APP
 # ------------------------------
-api_key = st.secrets["api_key"]
 url = st.text_input("Enter YouTube video URL:")
 
 if url:
@@ -100,8 +322,8 @@ if url:
         st.error("⚠️ Invalid YouTube URL")
     else:
         st.info("Fetching video details and comments...")
-        details = fetch_video_details(video_id, api_key)
-        df = fetch_comments(video_id, api_key)
+        details = fetch_video_details(video_id)
+        df = fetch_comments(video_id)
 
         if details and not df.empty:
             # ------------------------------
@@ -126,89 +348,45 @@ if url:
             # ------------------------------
             # COMMENT CLEANING & SENTIMENT
             # ------------------------------
-            df["Cleaned_Text"] = df["Text"].apply(clean_text)
-            df["Sentiment"] = df["Cleaned_Text"].apply(get_vader_sentiment)
-            df["PublishedAt"] = pd.to_datetime(df["PublishedAt"])
-
-            # ------------------------------
-            # DOWNLOAD CSV
-            # ------------------------------
-            csv = df.to_csv(index=False)
-            st.download_button("⬇️ Download Comments CSV", csv, "youtube_comments.csv", "text/csv")
+            # The cleaned text is only needed transiently (scoring and word
+            # counts), so it stays a local series and never widens the frame
+            cleaned_text = clean_comments(df["Text"])
+            # Emoji/URL-only comments clean down to empty strings; VADER would
+            # tokenize them just to return 0.0, so score only the rest
+            cleaned = cleaned_text.to_numpy()
+            nonempty = (cleaned_text.str.len() > 0).to_numpy(dtype=bool)
+            scores = np.zeros(len(df), dtype=np.float32)
+            scores[nonempty] = score_sentiment(cleaned[nonempty])
+            df["Compound"] = scores
+            # Categorical storage keeps int8 codes per row and makes the later
+            # value_counts a bincount over codes
+            df["Sentiment"] = pd.Categorical(
+                np.select([scores >= 0.05, scores <= -0.05], ["Positive", "Negative"], "Neutral"),
+                categories=["Positive", "Neutral", "Negative"],
+            )
 
-            # ------------------------------
-            # COMMENT ACTIVITY OVER MONTHS
-            # ------------------------------
-            st.subheader("📈 Comment Activity Over Time (Monthly)")
-            df["MonthYear"] = df["PublishedAt"].dt.to_period("M")
-            monthly_activity = df.groupby("MonthYear").size().reset_index(name="Count")
-            monthly_activity["MonthYearStr"] = monthly_activity["MonthYear"].astype(str)
-
-            options_month = {
-                "tooltip": {"trigger": "axis"},
-                "xAxis": {"type": "category", "data": monthly_activity["MonthYearStr"].tolist()},
-                "yAxis": {"type": "value"},
-                "series": [{"data": monthly_activity["Count"].tolist(), "type": "line", "smooth": True}],
+            # Count tokens with value_counts (a single C-level pass);
+            # single-letter tokens are dropped like WordCloud's own
+            # tokenizer does
+            token_counts = cleaned_text.str.split().explode().value_counts()
+            word_counts = {
+                word: int(count)
+                for word, count in token_counts.items()
+                if len(word) > 1 and word not in STOPWORDS
             }
-            st_echarts(options=options_month, height="400px")
-
-            # ------------------------------
-            # WORD CLOUD
-            # ------------------------------
-            st.subheader("☁️ Word Cloud of Most Frequent Words")
-            all_text = " ".join(df["Cleaned_Text"])
-            wordcloud = WordCloud(width=800, height=400, background_color="white").generate(all_text)
-            fig_wc, ax_wc = plt.subplots(figsize=(10, 5))
-            ax_wc.imshow(wordcloud, interpolation='bilinear')
-            ax_wc.axis("off")
-            st.pyplot(fig_wc)
 
             # ------------------------------
-            # TOP POSITIVE & NEGATIVE COMMENTS
+            # DOWNLOAD CSV
             # ------------------------------
-            st.subheader("💬 Sentiment Highlights")
-            pos_comments = df[df["Sentiment"] == "Positive"].sort_values("Likes", ascending=False).head(5)
-            neg_comments = df[df["Sentiment"] == "Negative"].sort_values("Likes", ascending=False).head(5)
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**Top Positive Comments:** 🌞")
-                for _, row in pos_comments.iterrows():
-                    st.write(f"👉 {row['Text']}  \n❤️ Likes: {row['Likes']}")
-            with col2:
-                st.markdown("**Top Negative Comments:** ⚡")
-                for _, row in neg_comments.iterrows():
-                    st.write(f"👎 {row['Text']}  \n💔 Likes: {row['Likes']}")
+            download_section(df, video_id)
 
             # ------------------------------
-            # INTERACTIVE SENTIMENT PIE CHART
+            # ANALYSIS SECTIONS (independent fragments)
             # ------------------------------
-            st.subheader("📊 Sentiment Distribution (Interactive)")
-            sentiment_counts = df["Sentiment"].value_counts()
-            data_list = [
-                {"value": int(sentiment_counts.get("Positive", 0)), "name": "Positive"},
-                {"value": int(sentiment_counts.get("Neutral", 0)), "name": "Neutral"},
-                {"value": int(sentiment_counts.get("Negative", 0)), "name": "Negative"},
-            ]
-
-            options = {
-                "tooltip": {"trigger": "item", "formatter": "{b}: {c} ({d}%)"},
-                "legend": {"top": "5%", "left": "center"},
-                "series": [
-                    {
-                        "name": "Sentiment",
-                        "type": "pie",
-                        "radius": ["40%", "70%"],
-                        "avoidLabelOverlap": False,
-                        "itemStyle": {"borderRadius": 10, "borderColor": "#fff", "borderWidth": 2},
-                        "emphasis": {"label": {"show": True, "fontSize": 20, "fontWeight": "bold"}},
-                        "label": {"show": False},
-                        "labelLine": {"show": False},
-                        "data": data_list,
-                    }
-                ],
-            }
-            st_echarts(options=options, height="400px")
+            monthly_activity_section(df)
+            wordcloud_section(word_counts)
+            sentiment_highlights_section(df)
+            sentiment_pie_section(df)
 
         else:
             st.warning("No comments found or video details unavailable.")
@@ -2,17 +2,163 @@
 Function that does the transformation to pass onto streamlit
 """
 
+import os
+import re
+import xml.etree.ElementTree as ET
+
 import googleapiclient.discovery
+from googleapiclient.model import JsonModel
+import numpy as np
 import pandas as pd
 import pycountry
+import swifter  # noqa: F401  (registers the .swifter accessor on Series)
 from cleantext import clean
 from langdetect import detect, LangDetectException
 from textblob import TextBlob
+import textblob.en
 import streamlit as st
+import time
 from datetime import datetime, timezone
+from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 import pytz
 
+# Parsed comment frames are persisted per video so a worker restart does not
+# re-spend API quota on a video analyzed within the TTL
+_PARQUET_CACHE_DIR = Path(".cache")
+_PARQUET_CACHE_TTL = 3600
+
+
+def _load_polarity_lexicon():
+    """Parse TextBlob's en-sentiment.xml into a word -> polarity dict.
+
+    Words with several senses get the mean polarity of their senses, which is
+    what TextBlob's pattern analyzer reports for an untagged token.
+    """
+    path = os.path.join(os.path.dirname(textblob.en.__file__), "en-sentiment.xml")
+    sums = {}
+    counts = {}
+    for _, elem in ET.iterparse(path):
+        if elem.tag == "word":
+            form = elem.get("form")
+            pol = elem.get("polarity")
+            if form and pol:
+                sums[form] = sums.get(form, 0.0) + float(pol)
+                counts[form] = counts.get(form, 0) + 1
+            elem.clear()
+    return {word: sums[word] / counts[word] for word in sums}
+
+
+POLARITY = _load_polarity_lexicon()
+NEGATIONS = {"not", "no", "never", "n't", "cannot", "neither", "nor"}
+
+# Flat lookup tables so the scoring loop works on int32 token ids instead of
+# Python strings: lexicon words first, then any negations missing from it.
+_VOCAB = {word: i for i, word in enumerate(POLARITY)}
+for _word in NEGATIONS:
+    _VOCAB.setdefault(_word, len(_VOCAB))
+_POLARITY_TABLE = np.zeros(len(_VOCAB), dtype=np.float32)
+for _word, _pol in POLARITY.items():
+    _POLARITY_TABLE[_VOCAB[_word]] = _pol
+_NEGATION_MASK = np.zeros(len(_VOCAB), dtype=np.bool_)
+for _word in NEGATIONS:
+    _NEGATION_MASK[_VOCAB[_word]] = True
+
+
+def _polarity_kernel(token_ids, offsets, polarity_table, negation_mask):
+    out = np.zeros(len(offsets) - 1, dtype=np.float32)
+    for i in range(len(offsets) - 1):
+        total = 0.0
+        matched = 0
+        neg = 1.0
+        for j in range(offsets[i], offsets[i + 1]):
+            tid = token_ids[j]
+            if tid < 0:
+                neg = 1.0
+            elif negation_mask[tid]:
+                neg = -0.5
+            else:
+                total += neg * polarity_table[tid]
+                matched += 1
+                neg = 1.0
+        if matched:
+            out[i] = total / matched
+    return out
+
+
+try:
+    # JIT-compile the straight-line kernel when numba is installed; the plain
+    # Python loop above is the fallback and is plenty for single-page fetches.
+    from numba import njit
+
+    _polarity_kernel = njit(cache=True)(_polarity_kernel)
+except ImportError:
+    pass
+
+
+def batch_polarity(texts):
+    """Function to get polarities for a whole batch of cleaned texts
+    Args:
+        texts: Sequence of cleaned (lowercased, stripped) comment strings
+    Returns:
+        float32 array of polarity scores, one per text
+
+    Scores come from TextBlob's sentiment lexicon with the -0.5 negation
+    multiplier, skipping the POS tagger that makes per-comment TextBlob
+    calls so expensive. Tokens are mapped to int32 ids up front so the
+    accumulation loop touches only typed arrays (and JIT-compiles under
+    numba when available).
+    """
+    token_ids = []
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    get_id = _VOCAB.get
+    for i, text in enumerate(texts):
+        token_ids.extend(get_id(token, -1) for token in text.split())
+        offsets[i + 1] = len(token_ids)
+    return _polarity_kernel(
+        np.asarray(token_ids, dtype=np.int32), offsets, _POLARITY_TABLE, _NEGATION_MASK
+    )
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that decodes API responses with orjson when installed.
+
+    orjson parses JSON several times faster than the stdlib decoder, which
+    matters on comment pages; with orjson missing this falls back to the
+    stock JsonModel behaviour.
+    """
+
+    def deserialize(self, content):
+        if orjson is None:
+            return super().deserialize(content)
+        body = orjson.loads(content)
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+
+@st.cache_resource(show_spinner=False)
+def _get_youtube_client():
+    """Build the YouTube client once per process and share it across calls.
+
+    static_discovery uses the bundled API description, so no discovery
+    document is fetched over the network either.
+    """
+    return googleapiclient.discovery.build(
+        "youtube",
+        "v3",
+        developerKey=st.secrets["api_key"],
+        cache_discovery=False,
+        static_discovery=True,
+        model=_OrjsonModel(),
+    )
+
 
 def get_polarity(text):
     """Function to get the polarity
@@ -53,6 +199,7 @@ def det_lang(language):
     return lang
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def parse_video(url) -> pd.DataFrame:
     """
     Args:
@@ -64,67 +211,74 @@ def parse_video(url) -> pd.DataFrame:
     # Get the video_id from the url
     video_id = _extract_video_id(url)
 
-    # creating youtube resource object
-    youtube = googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=st.secrets["api_key"]
-    )
+    # Disk cache hit: one columnar file read instead of network + cleaning
+    cache_path = _PARQUET_CACHE_DIR / f"{video_id}.parquet"
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < _PARQUET_CACHE_TTL:
+        return pd.read_parquet(cache_path)
+
+    # creating youtube resource object (shared, built once per process)
+    youtube = _get_youtube_client()
 
     # retrieve youtube video results
     video_response = (
         youtube.commentThreads()
-        .list(part="snippet", maxResults=100, order="relevance", videoId=video_id)
+        .list(
+            part="snippet",
+            maxResults=100,
+            order="relevance",
+            videoId=video_id,
+            fields="items(snippet(totalReplyCount,topLevelComment/snippet("
+            "textOriginal,authorDisplayName,publishedAt,likeCount)))",
+        )
         .execute()
     )
 
-    # empty list for storing reply
-    comments = []
+    # Struct-of-arrays accumulation: one list per column, so the DataFrame
+    # constructor gets pre-shaped columns instead of transposing row records
+    authors, texts, timestamps, likes, replies = [], [], [], [], []
 
     # extracting required info from each result object
     for item in video_response["items"]:
+        snippet = item["snippet"]["topLevelComment"]["snippet"]
         # Extracting comments
-        comment = item["snippet"]["topLevelComment"]["snippet"]["textOriginal"]
+        texts.append(snippet["textOriginal"])
         # Extracting author
-        author = item["snippet"]["topLevelComment"]["snippet"]["authorDisplayName"]
+        authors.append(snippet["authorDisplayName"])
         # Extracting published time
-        published_at = item["snippet"]["topLevelComment"]["snippet"]["publishedAt"]
+        timestamps.append(snippet["publishedAt"])
         # Extracting likes
-        like_count = int(
-            (
-                item.get("snippet", {})
-                .get("topLevelComment", {})
-                .get("snippet", {})
-                .get("likeCount", 0)
-            )
-            or 0
-        )
+        likes.append(int(snippet.get("likeCount", 0) or 0))
         # Extracting total replies to the comment
-        reply_count = int((item.get("snippet", {}).get("totalReplyCount", 0)) or 0)
-
-        comments.append([author, comment, published_at, like_count, reply_count])
+        replies.append(int(item["snippet"].get("totalReplyCount", 0) or 0))
 
     df_transform = pd.DataFrame(
         {
-            "Author": [i[0] for i in comments],
-            "Comment": [i[1] for i in comments],
-            "Timestamp": [i[2] for i in comments],
-            "Likes": [i[3] for i in comments],
-            "TotalReplies": [i[4] for i in comments],
+            "Author": authors,
+            "Comment": texts,
+            "Timestamp": timestamps,
+            "Likes": np.asarray(likes, dtype=np.int32),
+            "TotalReplies": np.asarray(replies, dtype=np.int32),
         }
     )
 
-    # Remove extra spaces and make them lower case. Replace special emojis
-    df_transform["Comment"] = df_transform["Comment"].apply(
-        lambda x: x.strip().lower().replace("xd", "").replace("<3", "")
-    )
-
-    # Clean text from line breaks, unicodes, emojis and punctuations
-    df_transform["Comment"] = df_transform["Comment"].apply(
+    # Normalize and clean in one fused pass per comment: clean() already
+    # lowercases, strips and collapses whitespace, so the separate .str
+    # normalization passes over the column were redundant work. Only the
+    # emoticon replacements happen before it (on the lowercased text).
+    df_transform["Comment"] = df_transform["Comment"].swifter.progress_bar(False).apply(
         lambda x: clean(
-            x, no_emoji=True, no_punct=True, no_line_breaks=True, fix_unicode=True
+            x.lower().replace("xd", "").replace("<3", ""),
+            no_emoji=True,
+            no_punct=True,
+            no_line_breaks=True,
+            fix_unicode=True,
         )
     )
-    # Detect the languages of the comments
-    df_transform["Language"] = df_transform["Comment"].apply(det_lang)
+    # Detect the languages of the comments across cores; langdetect is the
+    # slowest per-row step and parallelizes cleanly
+    df_transform["Language"] = (
+        df_transform["Comment"].swifter.progress_bar(False).apply(det_lang)
+    )
 
     # Convert ISO country codes to Languages
     df_transform["Language"] = df_transform["Language"].apply(
@@ -138,24 +292,39 @@ def parse_video(url) -> pd.DataFrame:
         df_transform[df_transform["Language"] == "Not-Detected"].index, inplace=True
     )
 
-    # Determining the polarity based on english comments
-    df_transform["TextBlob_Polarity"] = df_transform[["Comment", "Language"]].apply(
-        lambda x: get_polarity(x["Comment"]) if x["Language"] == "English" else "",
-        axis=1,
-    )
-
-    df_transform["TextBlob_Sentiment_Type"] = df_transform["TextBlob_Polarity"].apply(
-        lambda x: get_sentiment(x) if isinstance(x, float) else ""
+    # Few distinct languages per video: int8/int16 codes instead of one
+    # string object per row, and cheaper comparisons/aggregations downstream
+    df_transform["Language"] = df_transform["Language"].astype("category")
+
+    # Determining the polarity based on english comments. One lexicon pass
+    # computes the scores into a float array; the sentiment labels come from
+    # np.select over the same array, so no second apply runs.
+    english_mask = df_transform["Language"] == "English"
+    polarity = batch_polarity(df_transform.loc[english_mask, "Comment"].to_numpy())
+    # NaN (not "") marks non-English rows so the column stays float and the
+    # frame round-trips through parquet with stable dtypes
+    df_transform["TextBlob_Polarity"] = np.nan
+    df_transform.loc[english_mask, "TextBlob_Polarity"] = polarity
+    df_transform["TextBlob_Sentiment_Type"] = ""
+    df_transform.loc[english_mask, "TextBlob_Sentiment_Type"] = np.select(
+        [polarity > 0, polarity < 0], ["POSITIVE", "NEGATIVE"], "NEUTRAL"
     )
+    df_transform["TextBlob_Sentiment_Type"] = df_transform[
+        "TextBlob_Sentiment_Type"
+    ].astype("category")
 
     # Change the Timestamp
     df_transform["Timestamp"] = pd.to_datetime(df_transform["Timestamp"]).dt.strftime(
         "%Y-%m-%d %r"
     )
 
+    _PARQUET_CACHE_DIR.mkdir(exist_ok=True)
+    df_transform.to_parquet(cache_path)
+
     return df_transform
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def youtube_metrics(url) -> list:
     """Function to get views, likes and comment counts
     Args:
@@ -167,12 +336,18 @@ def youtube_metrics(url) -> list:
     # Get the video_id from the url
     video_id = _extract_video_id(url)
 
-    # creating youtube resource object
-    youtube = googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=st.secrets["api_key"]
-    )
+    # creating youtube resource object (shared, built once per process)
+    youtube = _get_youtube_client()
 
-    statistics_request = youtube.videos().list(part="statistics", id=video_id).execute()
+    statistics_request = (
+        youtube.videos()
+        .list(
+            part="statistics",
+            id=video_id,
+            fields="items(statistics(viewCount,likeCount,commentCount))",
+        )
+        .execute()
+    )
 
     metrics = []
 
@@ -240,11 +415,13 @@ def get_video_published_date(url):
     # Get the video_id from the url
     video_id = _extract_video_id(url)
 
-    youtube = googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=st.secrets["api_key"]
-    )
+    youtube = _get_youtube_client()
 
-    request = youtube.videos().list(part="snippet", id=video_id)
+    request = youtube.videos().list(
+        part="snippet",
+        id=video_id,
+        fields="items(snippet(publishedAt,title,channelTitle))",
+    )
     response = request.execute()
 
     if response["items"]:
@@ -262,13 +439,12 @@ def get_video_published_date(url):
         raise ValueError("Video not found")
 
 
+_VALID_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}\Z")
+
+
 def _is_valid_video_id(candidate: str) -> bool:
-    if len(candidate) != 11:
-        return False
-    for ch in candidate:
-        if not (ch.isalnum() or ch in ['-', '_']):
-            return False
-    return True
+    # One C-level match instead of a per-character Python loop
+    return _VALID_ID_RE.fullmatch(candidate) is not None
 
 
 def _extract_video_id(input_url: str) -> str: